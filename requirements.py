@@ -7,7 +7,8 @@ except ImportError:
     # Older Pybricks versions (kept for compatibility)
     from pybricks.pupdevices import XboxController
 from pybricks.parameters import Port, Direction, Button, Color
-from pybricks.tools import wait
+from pybricks.tools import wait, StopWatch
+from micropython import const
 
 hub = TechnicHub()
 hub.light.on(Color.RED)  # Red: Waiting
@@ -23,31 +24,71 @@ drive_motor2.control.limits(speed=2000, acceleration=20000)
 # Cruise + light state
 cruise_mode = False
 cruise_speed = 1000  # Adjust this: 2000 = full forward, -1000 = reverse, etc.
-cruise_speed_step = 100
-cruise_speed_min = -2000
-cruise_speed_max = 2000
-turn_slowdown = 300  # D-pad LEFT/RIGHT: temporarily slow one side to steer
-previous_lb_pressed = False
-previous_b_pressed = False
-previous_rb_pressed = False
-previous_up_pressed = False
-previous_down_pressed = False
+
+# Tuning constants: const() lets MicroPython inline them instead of a global lookup
+_CRUISE_STEP = const(100)
+_CRUISE_MIN = const(-2000)
+_CRUISE_MAX = const(2000)
+_TURN_SLOWDOWN = const(300)  # D-pad LEFT/RIGHT: temporarily slow one side to steer
+_JOY_SCALE = const(20)       # Joystick percent -> motor deg/s
+_SKID_THRESH = const(20)     # Joystick percent beyond which opposite sticks rumble
+_LOOP_PERIOD = const(50)     # Main loop tick in ms (20 Hz), independent of per-tick work
+_RETRY_DELAY = const(200)    # Pause between controller connect attempts (ms)
+
+# One bit per tracked button; the pressed set is folded into a mask once per tick
+LB_BIT = const(1 << 0)
+B_BIT = const(1 << 1)
+UP_BIT = const(1 << 2)
+DOWN_BIT = const(1 << 3)
+A_BIT = const(1 << 4)
+Y_BIT = const(1 << 5)
+RB_BIT = const(1 << 6)
+LEFT_BIT = const(1 << 7)
+RIGHT_BIT = const(1 << 8)
+prev_mask = 0  # Button mask from the previous tick (for edge detection)
+
+# Non-blocking light effects, advanced once per main-loop tick (times in ms)
+_clock = StopWatch()
+_A_SEQ = ((Color.BLUE, 200),)  # Button A: flash blue
+_Y_SEQ = ((Color.CYAN, 200), (Color.RED, 200), (Color.ORANGE, 200), (Color.RED, 200))
+_light_seq = None     # Active (color, ms) table, or None when idle
+_light_step = 0       # Index of the next step in _light_seq
+_light_deadline = 0   # When the next step is due
+
+# Last speed sent to each motor; run() is skipped when the command is unchanged
+_last_m1 = _last_m2 = None
 
 # Button B color cycle (press = next color, wraps around)
 b_color_cycle = [Color.BLUE, Color.CYAN, Color.ORANGE, Color.RED, Color.GREEN]
 b_color_index = -1  # -1 means "no override" (use mode colors)
+_N_COLORS = len(b_color_cycle)
 
 # Trigger debug overlay (LT/RT): when pressed, temporarily override hub light.
 trigger_debug = True
+TRIGGER_THRESHOLD = 0.05  # Trigger counts as held above this (float 0..1 or int 0..100)
 previous_lt_active = False
 previous_rt_active = False
 
+# Color currently shown on the hub light (None = unknown, e.g. after blink())
+_cur_color = None
+
+def _light(c):
+    """Turn the hub light to color c, skipping the write if it is already shown."""
+    global _cur_color
+    if c is not _cur_color:
+        hub.light.on(c)
+        _cur_color = c
+
 def set_base_light():
-    """Set hub light to the current 'base' color (B override if set, else mode)."""
+    """
+    Set hub light to the current 'base' color (B override if set, else mode).
+    Goes through _light(), so it is free when the base color is already shown.
+    """
     if b_color_index >= 0:
-        hub.light.on(b_color_cycle[b_color_index])
+        color = b_color_cycle[b_color_index]
     else:
-        hub.light.on(Color.YELLOW if cruise_mode else Color.GREEN)
+        color = Color.YELLOW if cruise_mode else Color.GREEN
+    _light(color)
 
 def _button_if_exists(name):
     """Return Button.<name> if it exists on this firmware, else None."""
@@ -56,105 +97,146 @@ def _button_if_exists(name):
     except Exception:
         return None
 
-def _trigger_values(controller):
+def _trigger_reader(controller):
     """
-    Try to read (LT, RT) analog trigger values.
-    Returns a tuple of (lt, rt) or (None, None) if unsupported.
+    Pick the (LT, RT) analog trigger reader this controller supports.
+    Returns a callable giving (lt, rt), or None if unsupported.
+    Resolved once at startup so the main loop does no reflection.
     """
     # Common patterns across libraries/versions:
     # - controller.triggers() -> (lt, rt)
     # - controller.trigger_left(), controller.trigger_right()
     # - controller.trigger_l(), controller.trigger_r()
-    try:
-        if hasattr(controller, "triggers"):
-            return controller.triggers()
-    except Exception:
-        pass
-
-    try:
-        if hasattr(controller, "trigger_left") and hasattr(controller, "trigger_right"):
-            return (controller.trigger_left(), controller.trigger_right())
-    except Exception:
-        pass
-
-    try:
-        if hasattr(controller, "trigger_l") and hasattr(controller, "trigger_r"):
-            return (controller.trigger_l(), controller.trigger_r())
-    except Exception:
-        pass
-
-    return (None, None)
-
-def _trigger_active(value):
-    """Heuristic: treat trigger as active if it is pressed beyond a small threshold."""
-    if value is None:
-        return False
-    try:
-        # float 0..1 or int 0..100 (or similar)
-        return value > 0.05
-    except Exception:
-        return False
-
-def stop_motors():
-    """Stop both drive motors in a way that works across Pybricks versions."""
+    candidates = []
+    if hasattr(controller, "triggers"):
+        candidates.append(controller.triggers)
+    if hasattr(controller, "trigger_left") and hasattr(controller, "trigger_right"):
+        candidates.append(lambda c=controller: (c.trigger_left(), c.trigger_right()))
+    if hasattr(controller, "trigger_l") and hasattr(controller, "trigger_r"):
+        candidates.append(lambda c=controller: (c.trigger_l(), c.trigger_r()))
+
+    # Probe each candidate once; keep the first one that actually works and
+    # whose values compare as numbers, so the main loop needs no try/except.
+    for read in candidates:
+        try:
+            lt, rt = read()
+            lt > TRIGGER_THRESHOLD
+            rt > TRIGGER_THRESHOLD
+            return read
+        except Exception:
+            pass
+
+    return None
+
+def _stop_strategy():
+    """
+    Pick a way to stop a motor that works on this Pybricks version.
+    Probed once at startup (motors are idle); returns a callable taking a motor.
+    """
     # Some Pybricks versions support stop(Stop.BRAKE); others only stop().
     try:
         from pybricks.parameters import Stop  # local import for compatibility
-        drive_motor1.stop(Stop.BRAKE)
-        drive_motor2.stop(Stop.BRAKE)
-        return
+        brake = Stop.BRAKE
+        drive_motor1.stop(brake)
+        return lambda m: m.stop(brake)
     except Exception:
         pass
 
     try:
         drive_motor1.stop()
-        drive_motor2.stop()
-        return
+        return lambda m: m.stop()
     except Exception:
         pass
 
     # Last resort: command 0 speed.
-    drive_motor1.run(0)
-    drive_motor2.run(0)
+    return lambda m: m.run(0)
+
+_stop_fn = _stop_strategy()
+
+def stop_motors():
+    """Stop both drive motors in a way that works across Pybricks versions."""
+    global _last_m1, _last_m2
+    # Forget the last commanded speeds so the next run() is always sent.
+    _last_m1 = _last_m2 = None
+    _stop_fn(drive_motor1)
+    _stop_fn(drive_motor2)
 
 # Retry loop for connection
 controller = None
+retrying = False
 while controller is None:
     try:
         controller = XboxController()
         set_base_light()  # Connected: show base light (mode or B override)
     except (OSError, RuntimeError) as e:
-        hub.light.blink(Color.ORANGE, [100, 100])  # Orange: Retrying
-        wait(5000)  # Wait 5s before retry
+        if not retrying:
+            # Start the blink once; it keeps animating on its own between attempts
+            hub.light.blink(Color.ORANGE, [100, 100])  # Orange: Retrying
+            _cur_color = None
+            retrying = True
+        wait(_RETRY_DELAY)  # Short pause, then try again
+
+# Hoist attribute lookups out of the main loop (each one is a dict lookup per tick)
+_LB, _B, _UP, _DOWN, _A, _Y, _RB, _LEFT, _RIGHT = (
+    Button.LB, Button.B, Button.UP, Button.DOWN, Button.A, Button.Y,
+    Button.RB, Button.LEFT, Button.RIGHT,
+)
+m1_run = drive_motor1.run
+m2_run = drive_motor2.run
+ctrl_buttons_pressed = controller.buttons.pressed
+joy_l = controller.joystick_left
+joy_r = controller.joystick_right
+_LT_BTN = _button_if_exists("LT")
+_RT_BTN = _button_if_exists("RT")
+# Only poll analog triggers when the debug overlay wants them and they exist
+_read_triggers = _trigger_reader(controller) if trigger_debug else None
+if _LT_BTN is None and _RT_BTN is None and _read_triggers is None:
+    trigger_debug = False  # Nothing to show: drop the overlay from the loop
+_BTN_BITS = (
+    (_LB, LB_BIT), (_B, B_BIT), (_UP, UP_BIT), (_DOWN, DOWN_BIT), (_A, A_BIT),
+    (_Y, Y_BIT), (_RB, RB_BIT), (_LEFT, LEFT_BIT), (_RIGHT, RIGHT_BIT),
+)
 
 # Main loop
+next_tick = _clock.time() + _LOOP_PERIOD
 while True:
-    # Read inputs once per loop (more reliable than polling pressed() repeatedly)
-    left_horizontal, left_vertical = controller.joystick_left()
-    right_horizontal, right_vertical = controller.joystick_right()
-    pressed = controller.buttons.pressed()
+    # Read inputs once per loop (more reliable than polling pressed() repeatedly).
+    # Joysticks are read further down, and only when not cruising.
+    pressed = ctrl_buttons_pressed()
+    now = _clock.time()
+
+    # Fold the pressed set into a bitmask once; everything below tests bits.
+    # Most ticks have nothing pressed, so skip the containment tests then.
+    mask = 0
+    if pressed:
+        for b, bit in _BTN_BITS:
+            if b in pressed:
+                mask |= bit
+    # One diff against last tick gives every edge at once
+    changed = mask ^ prev_mask
+    edges = changed & mask         # Went down this tick (rising edge)
+    released = changed & prev_mask  # Went up this tick (falling edge)
+    prev_mask = mask
 
     # LT/RT trigger debug: override light while held, restore base when released.
     if trigger_debug:
-        lt_btn = _button_if_exists("LT")
-        rt_btn = _button_if_exists("RT")
+        lt_active = (_LT_BTN in pressed) if _LT_BTN is not None else False
+        rt_active = (_RT_BTN in pressed) if _RT_BTN is not None else False
 
-        lt_active = (lt_btn in pressed) if lt_btn is not None else False
-        rt_active = (rt_btn in pressed) if rt_btn is not None else False
-
-        if not lt_active and not rt_active:
-            lt_val, rt_val = _trigger_values(controller)
-            lt_active = _trigger_active(lt_val)
-            rt_active = _trigger_active(rt_val)
+        # Analog read (a controller round-trip) only if the buttons say "not held"
+        if _read_triggers is not None and not lt_active and not rt_active:
+            lt_val, rt_val = _read_triggers()
+            lt_active = lt_val is not None and lt_val > TRIGGER_THRESHOLD
+            rt_active = rt_val is not None and rt_val > TRIGGER_THRESHOLD
 
         if lt_active or rt_active:
             # Pick colors that we know exist in your script already
             if lt_active and rt_active:
-                hub.light.on(Color.ORANGE)
+                _light(Color.ORANGE)
             elif lt_active:
-                hub.light.on(Color.BLUE)
+                _light(Color.BLUE)
             else:
-                hub.light.on(Color.CYAN)
+                _light(Color.CYAN)
         elif previous_lt_active or previous_rt_active:
             # Only restore when we transition from active -> inactive
             set_base_light()
@@ -162,34 +244,46 @@ while True:
         previous_lt_active = lt_active
         previous_rt_active = rt_active
 
-    # Detect LB button press (rising edge) to toggle cruise mode
-    lb_pressed = Button.LB in pressed
-    if lb_pressed and not previous_lb_pressed:
-        cruise_mode = not cruise_mode
-        if not cruise_mode:
-            # Explicitly stop when toggling cruise off
-            stop_motors()
-        set_base_light()
-    previous_lb_pressed = lb_pressed
-
-    # Button B: rumble + advance color cycle once per press (rising edge)
-    b_pressed = Button.B in pressed
-    if b_pressed and not previous_b_pressed:
-        controller.rumble(power=80, duration=250)
-        b_color_index = (b_color_index + 1) % len(b_color_cycle)
-        set_base_light()
-    previous_b_pressed = b_pressed
+    # Rising-edge actions; skipped outright on ticks with no new press
+    if edges:
+        # Detect LB button press (rising edge) to toggle cruise mode
+        if edges & LB_BIT:
+            cruise_mode = not cruise_mode
+            if not cruise_mode:
+                # Explicitly stop when toggling cruise off
+                stop_motors()
+            set_base_light()
 
-    # D-pad UP/DOWN: adjust cruise speed (persists after release)
-    up_pressed = Button.UP in pressed
-    if up_pressed and not previous_up_pressed:
-        cruise_speed = min(cruise_speed + cruise_speed_step, cruise_speed_max)
-    previous_up_pressed = up_pressed
+        # Button B: rumble + advance color cycle once per press (rising edge)
+        if edges & B_BIT:
+            controller.rumble(power=80, duration=250)
+            b_color_index += 1
+            if b_color_index == _N_COLORS:
+                b_color_index = 0
+            set_base_light()
 
-    down_pressed = Button.DOWN in pressed
-    if down_pressed and not previous_down_pressed:
-        cruise_speed = max(cruise_speed - cruise_speed_step, cruise_speed_min)
-    previous_down_pressed = down_pressed
+        # D-pad UP/DOWN: adjust cruise speed (persists after release)
+        if edges & UP_BIT:
+            cruise_speed += _CRUISE_STEP
+            if cruise_speed > _CRUISE_MAX:
+                cruise_speed = _CRUISE_MAX
+
+        if edges & DOWN_BIT:
+            cruise_speed -= _CRUISE_STEP
+            if cruise_speed < _CRUISE_MIN:
+                cruise_speed = _CRUISE_MIN
+
+        # Button A: Flash blue, then return to current mode color
+        if edges & A_BIT:
+            _light_seq = _A_SEQ
+            _light_step = 0
+            _light_deadline = now
+
+        # Button Y: Your original color sequence
+        if edges & Y_BIT:
+            _light_seq = _Y_SEQ
+            _light_step = 0
+            _light_deadline = now
 
     # Determine motor speeds
     if cruise_mode:
@@ -198,49 +292,57 @@ while True:
 
         # No rumble in cruise mode
     else:
-        motor1_speed = left_vertical * 20
-        motor2_speed = right_vertical * 20
-
-        # Rumble if joysticks pushed in opposite directions (skid-steer warning)
-        if (left_vertical > 20 and right_vertical < -20) or (left_vertical < -20 and right_vertical > 20):
+        left_horizontal, left_vertical = joy_l()
+        right_horizontal, right_vertical = joy_r()
+        motor1_speed = left_vertical * _JOY_SCALE
+        motor2_speed = right_vertical * _JOY_SCALE
+
+        # Rumble if joysticks pushed in opposite directions (skid-steer warning).
+        # A negative product means opposite signs; the cheap product test rejects
+        # the common case first, the abs() checks keep the original 20% deadband.
+        if (left_vertical * right_vertical < -_SKID_THRESH * _SKID_THRESH
+                and abs(left_vertical) > _SKID_THRESH and abs(right_vertical) > _SKID_THRESH):
             controller.rumble(power=50, duration=100)
 
     # D-pad LEFT/RIGHT: temporarily slow one side (release returns to previous speeds)
-    if Button.RIGHT in pressed:
-        motor2_speed = max(motor2_speed - turn_slowdown, cruise_speed_min)
-    if Button.LEFT in pressed:
-        motor1_speed = max(motor1_speed - turn_slowdown, cruise_speed_min)
-
-    # Run motors
-    drive_motor1.run(motor1_speed)
-    drive_motor2.run(motor2_speed)
-
-    # Button A: Flash blue, then return to current mode color
-    if Button.A in pressed:
-        hub.light.on(Color.BLUE)
-        wait(200)
-        set_base_light()
-
-    # Button Y: Your original color sequence (unchanged)
-    if Button.Y in pressed:
-        hub.light.on(Color.CYAN)
-        wait(200)
-        hub.light.on(Color.RED)
-        wait(200)
-        hub.light.on(Color.ORANGE)
-        wait(200)
-        hub.light.on(Color.RED)
-        wait(200)
-        set_base_light()
+    motor1_speed -= _TURN_SLOWDOWN if mask & LEFT_BIT else 0
+    motor2_speed -= _TURN_SLOWDOWN if mask & RIGHT_BIT else 0
+    if motor1_speed < _CRUISE_MIN:
+        motor1_speed = _CRUISE_MIN
+    if motor2_speed < _CRUISE_MIN:
+        motor2_speed = _CRUISE_MIN
+
+    # Run motors (only when the commanded speed actually changed)
+    if motor1_speed != _last_m1:
+        m1_run(motor1_speed)
+        _last_m1 = motor1_speed
+    if motor2_speed != _last_m2:
+        m2_run(motor2_speed)
+        _last_m2 = motor2_speed
+
+    # Step the active light sequence (a new press replaces it), then restore base
+    if _light_seq is not None and now >= _light_deadline:
+        if _light_step < len(_light_seq):
+            color, duration = _light_seq[_light_step]
+            _light(color)
+            _light_deadline += duration
+            _light_step += 1
+        else:
+            _light_seq = None
+            set_base_light()
 
     # Button RB: Set red while held (unchanged)
-    rb_pressed = Button.RB in pressed
-    if rb_pressed:
-        hub.light.on(Color.RED)
-    elif previous_rb_pressed:
+    if mask & RB_BIT:
+        _light(Color.RED)
+    elif released & RB_BIT:
         # Restore base color on release
         set_base_light()
-    previous_rb_pressed = rb_pressed
 
-    # Small delay to prevent overload
-    wait(50)
+    # Sleep only for what is left of this tick so the loop rate stays fixed
+    delay = next_tick - _clock.time()
+    if delay > 0:
+        wait(delay)
+        next_tick += _LOOP_PERIOD
+    else:
+        # Overran the tick: resync instead of bursting to catch up
+        next_tick = _clock.time() + _LOOP_PERIOD